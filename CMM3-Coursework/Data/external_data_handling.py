@@ -5,10 +5,11 @@ This module provides functionality to collect and preprocess data required for t
 It includes methods to fetch weather data using the Meteostat API and to parse YAML configuration files.
 
 Global Functions:
-- `getYAML`: Reads and parses a YAML configuration file into a dictionary.
+- `getYAML`: Reads and parses a YAML configuration file into a dictionary (cached per file).
 
 Classes:
 - 'InputValues'
+- 'EvenSpacedPchip'
 - 'AmbientTempData'
 - 'ManufacturerData'
 
@@ -17,25 +18,49 @@ Dependencies:
 - `numpy`: For numerical operations.
 - `yaml`: For parsing YAML files.
 - `meteostat`: For retrieving historical weather data.
+- `numba`: For compiling the interpolator evaluation loop.
 - `datetime`: For managing date and time inputs.
+- `pyarrow`: For the on-disk Parquet cache of Meteostat data.
 """
 
 
-from datetime import datetime
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+import copy
+from datetime import datetime, timedelta
+from functools import lru_cache
+import hashlib
 from meteostat import Hourly, Point
 import os
 import pandas as pd
 import numpy as np
+from numba import njit, prange
 import yaml
 from scipy.optimize import curve_fit
 from scipy.interpolate import PchipInterpolator
 from Simulator import formulae
 
+# Use the libyaml C loader when PyYAML was built with it
+try:
+    from yaml import CSafeLoader as _SafeLoader
+except ImportError:
+    from yaml import SafeLoader as _SafeLoader
+
+# Directory of this module, which also holds the YAML data files
+_SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Parsed YAML files, keyed by absolute path -> ((mtime, size), data)
+_YAML_CACHE = OrderedDict()
+_YAML_CACHE_SIZE = 100
+
 
 def getYAML(file_name):
     """
     Reads and parses a YAML configuration file into a Python dictionary.
 
+    Parsed files are cached and only re-read when their modification time or size
+    changes. A deep copy is returned so callers can modify the data freely.
+
     Args:
         fileName (str): The path to the YAML file.
 
@@ -46,13 +71,26 @@ def getYAML(file_name):
         Exception: If there is an error reading or parsing the YAML file.
     """
     try:
-        script_dir = os.path.dirname(os.path.abspath(__file__))
-        file_path = os.path.join(script_dir, file_name)  # Create the full path
+        file_path = os.path.join(_SCRIPT_DIR, file_name)  # Create the full path
+        
+        # Return the cached copy if the file hasn't changed since it was parsed
+        st = os.stat(file_path)
+        signature = (st.st_mtime, st.st_size)
+        cached = _YAML_CACHE.get(file_path)
+        if cached is not None and cached[0] == signature:
+            _YAML_CACHE.move_to_end(file_path)
+            return copy.deepcopy(cached[1])
         
         # Open and load the YAML file into a dictionary
         with open(file_path, 'r') as file:
-            input_dict = yaml.safe_load(file)
-        return input_dict
+            input_dict = yaml.load(file, Loader=_SafeLoader)
+        
+        # Store in the cache, evicting the least recently used file if full
+        _YAML_CACHE[file_path] = (signature, input_dict)
+        _YAML_CACHE.move_to_end(file_path)
+        if len(_YAML_CACHE) > _YAML_CACHE_SIZE:
+            _YAML_CACHE.popitem(last=False)
+        return copy.deepcopy(input_dict)
 
     except Exception as e:
         # Print an error message if the YAML file cannot be loaded
@@ -64,11 +102,23 @@ class InputValues:
         # Get the directory of the current script (where ManufacturerCOP is defined)
         self.input_name = input_name
         self.data = None
+        self._flat = {} # (ValueType, ValueName) -> value, for single lookup access
         
     def load_data(self):
         self.data = getYAML(self.input_name)
+        if self.data is None:
+            self._flat = {}
+            return # getYAML has already reported the error; value() raises "Input Data not Loaded"
+        
+        # Flatten the nested input data once so value() is a single dict lookup
+        self._flat = {(t, n): spec.get("value", None) for t, group in self.data.items() for n, spec in group.items()}
         
     def value(self, ValueType, ValueName):
+        try:
+            return self._flat[(ValueType, ValueName)]
+        except KeyError:
+            pass # Fall through to report why the value is missing
+        
         # Check if the data is loaded
         if self.data is None:
             raise ValueError("Input Data not Loaded")
@@ -86,10 +136,88 @@ class InputValues:
    
     def change_input_value(self, ValueType, ValueName, newValue): #Changing the held value not the one stored in inputs.yaml
         self.data[ValueType][ValueName]["value"] = newValue
+        self._flat[(ValueType, ValueName)] = newValue
+
+@lru_cache(maxsize=64)
+def _point(Xloc, Yloc):
+    """
+    Returns a cached Meteostat `Point`, so repeated runs at the same location reuse it.
+    """
+    return Point(Xloc, Yloc)
+
+@njit(cache=True, fastmath=True, parallel=True)
+def _pchip_eval(t, t0, dt, c):
+    """
+    Evaluates evenly spaced PCHIP coefficients `c` (shape (4, n-1)) at each point in `t`.
+    """
+    last = c.shape[1] - 1
+    out = np.empty_like(t)
+    for i in prange(t.size):
+        # Interval index, clamped so points outside the data extrapolate from the end intervals
+        idx = int(np.floor((t[i] - t0) / dt))
+        if idx < 0:
+            idx = 0
+        elif idx > last:
+            idx = last
+        dx = t[i] - t0 - idx * dt
+        out[i] = ((c[0, idx] * dx + c[1, idx]) * dx + c[2, idx]) * dx + c[3, idx]
+    return out
+
+class EvenSpacedPchip:
+    """
+    PCHIP interpolator specialised for evenly spaced data such as hourly Meteostat temperatures.
+
+    The PCHIP coefficients are computed once with `PchipInterpolator`, but as the grid spacing
+    is constant the interval containing `t` is found directly as `(t - t0) // dt` instead of
+    with a binary search. Array evaluation runs in a Numba-compiled loop and, like
+    `PchipInterpolator`, extrapolates using the first/last interval polynomials. Scalar
+    calls reuse the coefficients of the previous interval when `t` still falls inside it.
+    """
+    def __init__(self, x, y):
+        x = np.asarray(x, dtype=np.float64)
+        self.t0 = x[0]
+        self.dt = x[1] - x[0]
+        self.n = len(x)
+        
+        # The interval lookup is only valid on a uniform grid, so gaps in the data must be rejected
+        if not np.allclose(np.diff(x), self.dt):
+            raise ValueError("EvenSpacedPchip requires evenly spaced x values")
+        
+        # Polynomial coefficients of each interval, shape (4, n-1), highest power first
+        self.c = np.ascontiguousarray(PchipInterpolator(x, y).c)
+        
+        # Last interval used by a scalar call, as successive calls usually land in the same one
+        self._x_left = np.inf
+        self._coeffs = None
+    
+    def __call__(self, t):
+        if isinstance(t, float):
+            # Scalar query: only find the interval again if t has left the cached one
+            if not (self._x_left <= t < self._x_left + self.dt):
+                idx = min(max(int((t - self.t0) // self.dt), 0), self.n - 2)
+                self._x_left = self.t0 + idx * self.dt
+                self._coeffs = tuple(self.c[:, idx].tolist())
+            
+            c0, c1, c2, c3 = self._coeffs
+            dx = t - self._x_left
+            return ((c0 * dx + c1) * dx + c2) * dx + c3
+        
+        # Array query: evaluate every point in the compiled kernel
+        t = np.asarray(t, dtype=np.float64)
+        flat = np.ascontiguousarray(t).ravel()
+        return _pchip_eval(flat, self.t0, self.dt, self.c).reshape(t.shape)
 
 class AmbientTempData:
+    # Long time ranges are fetched from Meteostat in parallel chunks of this length
+    FETCH_CHUNK = timedelta(days=180)
+    FETCH_WORKERS = 4
+    
+    # Cleaned Meteostat data is cached here so repeated runs don't hit the network
+    CACHE_DIR = os.path.join(os.path.expanduser("~"), ".hpsim_cache")
+    
     def __init__(self):
         self.location = None
+        self.coordinates = None
         
         self.start_time = None
         self.end_time = None
@@ -99,7 +227,8 @@ class AmbientTempData:
     
     def set_location(self, location):
         Xloc, Yloc = location
-        self.location = Point(Xloc, Yloc)
+        self.coordinates = (round(Xloc, 4), round(Yloc, 4)) # Coordinates within ~10 m share a Point and cache file
+        self.location = _point(*self.coordinates)
         
     def set_start_time(self, Year, Month, Day, Hour):
         self.start_time = datetime(Year, Month, Day, Hour)
@@ -110,6 +239,7 @@ class AmbientTempData:
     def import_meteostat_data(self):
         """
         Fetches hourly temperature data for a specified location and time range using the Meteostat API.
+        Cleaned data is cached to a Parquet file and reused for the same location and time range.
 
         Returns:
             pd.DataFrame: DataFrame containing hourly temperature data with columns:
@@ -128,23 +258,85 @@ class AmbientTempData:
         if self.end_time is None:
             raise ValueError("No end time set")
         
+        # Load previously cleaned data for this location and time range if available. Ranges that
+        # reach today may still be missing data, so they are always fetched and never cached
+        cache_path = self.cache_path()
+        cacheable = self.end_time < datetime.combine(datetime.today(), datetime.min.time())
+        if cacheable and os.path.exists(cache_path):
+            try:
+                self.meteostat_data = pd.read_parquet(cache_path)
+                return
+            except Exception as e:
+                print(f"Error reading cached Meteostat data: {e}")
+        
         try:
-            # Fetch hourly weather data for the specified location and time range
-            self.meteostat_data = Hourly(self.location, self.start_time, self.end_time).fetch()
-
-            # Add a 'hours' column representing elapsed time in hours
-            self.meteostat_data['hours'] = np.arange(len(self.meteostat_data))
+            # Fetch hourly weather data for the specified location and time range,
+            # keeping only the temperature column needed for the simulation
+            data = self.fetch_hourly()[['temp']].copy()
+            
+            # Meteostat leaves out hours with no observation, so fill the hourly grid back in and
+            # interpolate the missing temperatures, keeping the data evenly spaced
+            data = data.asfreq('h')
+            data['temp'] = data['temp'].interpolate(method='time', limit_direction='both')
 
             # Convert temperature from Celsius to Kelvin
-            self.meteostat_data['temp'] = self.meteostat_data['temp'] + 273.15
+            data['temp'] = data['temp'].to_numpy() + 273.15
 
-            # Drop unnecessary columns for the simulation
-            self.meteostat_data = self.meteostat_data.drop(['dwpt', 'rhum', 'prcp', 'snow', 'wdir', 'wspd', 'wpgt', 'pres', 'tsun', 'coco'], axis=1)
+            # Add a 'hours' column representing elapsed time in hours
+            data['hours'] = np.arange(len(data), dtype=np.int32)
+            
+            self.meteostat_data = data
 
         except Exception as e:
             # Print an error message and return an empty DataFrame in case of failure
             print(f"Error fetching Meteostat data: {e}")
             self.meteostat_data = pd.DataFrame()
+            return
+        
+        # Cache the cleaned data for later runs
+        if cacheable and not self.meteostat_data.empty:
+            try:
+                os.makedirs(self.CACHE_DIR, exist_ok=True)
+                self.meteostat_data.to_parquet(cache_path, compression='zstd')
+            except Exception as e:
+                print(f"Error caching Meteostat data: {e}")
+    
+    def cache_path(self):
+        """
+        Returns the Parquet cache file path for the current location (rounded as in `set_location`)
+        and time range.
+        """
+        Xloc, Yloc = self.coordinates
+        key = hashlib.sha1(f"{Xloc}_{Yloc}_{self.start_time}_{self.end_time}".encode()).hexdigest()
+        return os.path.join(self.CACHE_DIR, f"meteo_{key}.parquet")
+    
+    def fetch_hourly(self):
+        """
+        Fetches the raw hourly Meteostat data between the start and end times.
+        
+        Ranges longer than `FETCH_CHUNK` are split into consecutive chunks which are
+        requested concurrently, as each fetch is dominated by network latency.
+        
+        Returns:
+            pd.DataFrame: Hourly Meteostat data in time order.
+        """
+        if self.end_time - self.start_time <= self.FETCH_CHUNK:
+            return Hourly(self.location, self.start_time, self.end_time).fetch()
+        
+        # Split the time range into consecutive chunks
+        ranges = []
+        chunk_start = self.start_time
+        while chunk_start < self.end_time:
+            chunk_end = min(chunk_start + self.FETCH_CHUNK, self.end_time)
+            ranges.append((chunk_start, chunk_end))
+            chunk_start = chunk_end
+        
+        with ThreadPoolExecutor(max_workers=self.FETCH_WORKERS) as pool:
+            chunks = list(pool.map(lambda r: Hourly(self.location, r[0], r[1]).fetch(), ranges))
+        
+        # Chunk end times are inclusive, so drop the repeated hour at each boundary
+        data = pd.concat(chunks)
+        return data[~data.index.duplicated(keep='first')]
     
     def interpolate_data(self):
         """
@@ -157,19 +349,24 @@ class AmbientTempData:
             function: An interpolator function that estimates temperature at any time.
     
         Behavior:
-            - Uses `PchipInterpolator` for smooth interpolation of temperature data.
-            - Interpolates temperature based on the `time` index of the DataFrame.
+            - Uses `EvenSpacedPchip` for smooth interpolation of the hourly temperature data.
+            - Interpolates temperature against hours elapsed since the first `time` index of the DataFrame.
         """
         if self.meteostat_data is None:
             raise ValueError("Meteostat data not imported")
             
         try:
-            # Extract time and temperature data
-            times = self.meteostat_data.index.values
+            # Extract time (hours since the start of the data) and temperature data
+            index = self.meteostat_data.index.values
+            times = (index - index[0]) / np.timedelta64(1, 'h')
             temps = self.meteostat_data['temp'].values
     
-            # Create and return the interpolator function
-            self.interpolated_data = PchipInterpolator(times, temps)
+            # Create and return the interpolator function, falling back to the general PCHIP
+            # interpolator if the data isn't evenly spaced (e.g. a cache written with gaps)
+            try:
+                self.interpolated_data = EvenSpacedPchip(times, temps)
+            except ValueError:
+                self.interpolated_data = PchipInterpolator(times, temps)
     
         except Exception as e:
             print(f"Error creating temperature interpolator: {e}")
@@ -182,6 +379,9 @@ class AmbientTempData:
         return self.interpolated_data
 
 class ManufacturerCOP:
+    # Fitted (fit_a, fit_b, std_error), keyed by (file path, condenser temp, mtime, size)
+    _FIT_CACHE = {}
+    
     def __init__(self, file_name):
         self.file_name = file_name
         self.fit_a = None
@@ -210,32 +410,37 @@ class ManufacturerCOP:
             - Computes delta T (temperature difference between condenser and outdoor temperatures).
             - Fits the COP data to a mathematical model using `curve_fit`.
             - Returns the fitted parameters and standard error of the fit.
+            - Reuses a previous fit if the file and condenser temperature are unchanged.
         """
         try:
-            script_dir = os.path.dirname(os.path.abspath(__file__))
-            file_path = os.path.join(script_dir, self.file_name)  # Create the full path
+            file_path = os.path.join(_SCRIPT_DIR, self.file_name)  # Create the full path
+            
+            # Reuse the fit if this file and condenser temperature have been fitted before
+            st = os.stat(file_path)
+            cache_key = (file_path, round(condenserTemp, 6), st.st_mtime, st.st_size)
+            if cache_key in ManufacturerCOP._FIT_CACHE:
+                self.fit_a, self.fit_b, self.std_error = ManufacturerCOP._FIT_CACHE[cache_key]
+                return
             
             # Load COP data from the specified YAML file
-            with open(file_path, 'r') as file:
-                cop_data = yaml.safe_load(file)
+            cop_data = getYAML(self.file_name)
     
-            # Convert COP data to a DataFrame
-            cop_df = pd.DataFrame(cop_data['heat_pump_cop_data'])
+            # Prepare data for curve fitting (the YAML file stores each quantity as a column)
+            columns = cop_data['heat_pump_cop_data']
+            outdoor = np.asarray(columns['outdoor_temp_C'], dtype=np.float64)
+            copNoisy = np.asarray(columns['COP_noisy'], dtype=np.float64)
     
             # Calculate delta T (condenser temperature minus outdoor temperature)
-            cop_df['delta_T'] = (condenserTemp - 273.15) - cop_df['outdoor_temp_C']
-    
-            # Prepare data for curve fitting
-            deltaT = cop_df['delta_T'].to_numpy()
-            copNoisy = cop_df['COP_noisy'].to_numpy()
+            deltaT = (condenserTemp - 273.15) - outdoor
     
             # Fit the COP model to the noisy COP data
-            parameters, covariance = curve_fit(formulae.COP, deltaT, copNoisy)
+            parameters, covariance = curve_fit(formulae.COP, deltaT, copNoisy, jac=formulae.COP_jac)
             self.fit_a, self.fit_b = parameters  # Extract fitted parameters
     
             # Calculate the standard error of the fit
             self.std_error = np.sqrt(np.diag(covariance)).mean()
-    
+            
+            ManufacturerCOP._FIT_CACHE[cache_key] = (self.fit_a, self.fit_b, self.std_error)
     
         except Exception as e:
             print(f"Error calculating COP parameters: {e}")
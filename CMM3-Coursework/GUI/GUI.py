@@ -12,6 +12,7 @@ Modules Used:
 - `tkinter.messagebox`: For displaying error messages.
 - `yaml`: For working with YAML configuration files.
 - `subprocess`: To run external scripts for simulation.
+- `threading`: To run the sensitivity analysis sweep without blocking the GUI.
 
 Functions:
 - Sets up the main window and tabs for simulation and analysis.
@@ -23,9 +24,24 @@ Functions:
 import customtkinter as ctk
 from matplotlib.figure import Figure
 from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
-import json
 import matplotlib as plt
+import numpy as np
+import threading
 
+# Dark theme applied to every figure, matching CustomTkinter's dark mode
+plt.rcParams.update({
+    "figure.facecolor": "#2e2e2e",  # Match CustomTkinter theme
+    "axes.facecolor": "#1e1e1e",    # Dark axes background
+    "axes.edgecolor": "white",      # White spines
+    "axes.labelcolor": "white",     # White axis labels
+    "axes.titlecolor": "white",     # White title
+    "xtick.color": "white",         # White ticks
+    "ytick.color": "white",
+    "axes.grid": True,              # Light grid
+    "grid.color": "gray",
+    "grid.linestyle": "-",
+    "grid.linewidth": 1
+})
 
 ### Import GUI modules ###
 #from .plot_tabs import PlotTabs # Functions for running the simulation and sensitivity analysis.
@@ -61,7 +77,7 @@ class GUIclass(ctk.CTk):
 
        ### Graph Tabs
         self.graph_tabs = ctk.CTkTabview(
-            self, width=400, height=300, corner_radius=10, fg_color="grey15"
+            self, width=400, height=300, corner_radius=10, fg_color="grey15", command=self.tab_changed
        )   # Smaller graph area
         self.graph_tabs.grid(row=0, column=1, sticky="nsew", padx=10, pady=10)
 
@@ -81,6 +97,11 @@ class GUIclass(ctk.CTk):
         self.toggle_switch = ctk.CTkSwitch(self.entry_frame, text="Simulate DHW", command=self.DHW_switch_event,variable=self.switch_var, onvalue="on", offvalue="off")
         self.toggle_switch.grid(row=10, column=0, sticky="w", padx=10, pady=10)
         
+        # Solver Toggle
+        self.solver_var = ctk.StringVar(value="euler")
+        self.solver_switch = ctk.CTkSwitch(self.entry_frame, text="Adaptive Solver", command=self.solver_switch_event, variable=self.solver_var, onvalue="adaptive", offvalue="euler")
+        self.solver_switch.grid(row=11, column=0, sticky="w", padx=10, pady=10)
+        
         # Default Options Button
         self.text_button = ctk.CTkButton(self.entry_frame, text="Set Default Parameters" ,command=self.default_params_button, fg_color="gray29", text_color="white", hover_color="grey41", border_color="black")
         self.text_button.grid(row=10, column=1, sticky="e", padx=10, pady=10)
@@ -98,48 +119,28 @@ class GUIclass(ctk.CTk):
         )
         self.simulation_complete_label.grid(row=4, column=0, columnspan=2, pady=10)
         self.simulation_complete_label.grid_remove()  # Hide label initially    
+        self.hide_label_job = None # Pending callback that hides the label again
+        
+        ## Export button
+        self.export_button = ctk.CTkButton(self.sidebar_frame, text="Export Results", command=self.export_results, fg_color="gray29", text_color="white", hover_color="grey41")
+        self.export_button.grid(row=5, column=0, sticky="nsew", padx=10, pady=10)
         
         
         
         self.graph_canvases = {}
         self.figures = {}
+        self.lines = {}
+        self.loaded_tabs = set() # Tracks tabs whose figures have been built
+        self.results = None # Most recent simulation results
         
-        for tab_name, (json_name, displaytype) in self.all_tabs.items():
+        # Figures are only built when their tab is first viewed
+        for tab_name in self.all_tabs:
             tab = self.graph_tabs.add(tab_name)
             tab.grid_rowconfigure(0, weight=1)
             tab.grid_columnconfigure(0, weight=1)
-            
-            if displaytype == "plot":
-                # Create a matplotlib figure for each tab
-                figure = Figure(figsize=(8, 7), dpi=100)
-                ax = figure.add_subplot(111)
-                ax.set_title(tab_name)
-                figure.patch.set_facecolor("#2e2e2e")  # Match CustomTkinter theme
-                ax.set_facecolor("#1e1e1e")            # Dark axes background
-                ax.spines['top'].set_color("white")
-                ax.spines['right'].set_color("white")
-                ax.spines['bottom'].set_color("white")
-                ax.spines['left'].set_color("white")
-                ax.tick_params(colors="white")       # White ticks
-                ax.title.set_color("white")          # White title
-                ax.xaxis.label.set_color("white")    # White x-axis label
-                ax.yaxis.label.set_color("white")    # White y-axis label
-                ax.grid(color="gray", linestyle="-", linewidth=1)  # Light grid
-                ax.plot([], [])  # Empty plot initially
-                
-                # Embed the figure in the tab
-                canvas = FigureCanvasTkAgg(figure, tab)
-                canvas_widget = canvas.get_tk_widget()
-                canvas_widget.grid(row=0, column=0, sticky="nsew", padx=10, pady=10)
-                
-                # Store references for later updates
-                self.figures[tab_name] = figure
-                self.graph_canvases[tab_name] = canvas
-
         
         self.graph_tabs.tab("Tank Temperature").grid_columnconfigure(0, weight=1) 
-        
-        self.loaded_tabs = set() # Tracks tabs loaded
+        self.ensure_figure(self.graph_tabs.get())
         
         ### Sensitivity Analysis
         self.analysis_frame = ctk.CTkFrame(self, corner_radius=10, fg_color="grey12")
@@ -192,42 +193,66 @@ class GUIclass(ctk.CTk):
         fg_color="green"
         )
         self.sensitivity_button.grid(row=3, column=0, columnspan=2, padx=10, pady=10)
+        self.bar_chart_canvas = None # Canvas of the latest sensitivity analysis chart
     
-    def update_graph(self):
-        """Update the graph based on the selected tab."""
-        # Update the graphs in each tab
+    def tab_changed(self):
+        """Build the figure for the newly selected tab if it hasn't been viewed yet."""
+        self.ensure_figure(self.graph_tabs.get())
+    
+    def ensure_figure(self, tab_name):
+        """Create the matplotlib figure for a plot tab the first time it is needed."""
+        json_name, displaytype = self.all_tabs[tab_name]
+        if displaytype != "plot" or tab_name in self.loaded_tabs:
+            return
+        
+        tab = self.graph_tabs.tab(tab_name)
+        
+        # Create a matplotlib figure for the tab
+        figure = Figure(figsize=(8, 7), dpi=100)
+        ax = figure.add_subplot(111)
+        ax.set_title(tab_name)
+        line, = ax.plot([], [], label=f"{tab_name} data")  # Empty plot initially
+        ax.legend()
         
-        with open("./Data/simulation_results.json", "r") as file:
-            data = json.load(file)
+        # Embed the figure in the tab
+        canvas = FigureCanvasTkAgg(figure, tab)
+        canvas_widget = canvas.get_tk_widget()
+        canvas_widget.grid(row=0, column=0, sticky="nsew", padx=10, pady=10)
+        
+        # Store references for later updates
+        self.figures[tab_name] = figure
+        self.graph_canvases[tab_name] = canvas
+        self.lines[tab_name] = line
+        self.loaded_tabs.add(tab_name)
+        
+        # Show the latest results if a simulation has already been run
+        if self.results is not None:
+            self.plot_tab(tab_name, self.results)
+    
+    def plot_tab(self, tab_name, data):
+        """Plot simulation results in a tab whose figure has been built."""
+        json_name, displaytype = self.all_tabs[tab_name]
+        
+        # Replace the data of the existing line and rescale the axes to fit it
+        self.lines[tab_name].set_data(data["time"], data[json_name])
+        ax = self.figures[tab_name].gca()
+        ax.relim()
+        ax.autoscale_view()
+        
+        # Refresh the canvas on the next idle cycle
+        self.graph_canvases[tab_name].draw_idle()
+    
+    def update_graph(self, results=None):
+        """Update the graph based on the selected tab."""
+        # Update the graphs in each tab using the results held by the simulation object
+        data = results if results is not None else self.SimulationObject.simulation_results
+        self.results = data
 
-        # Extract shared time data
-        time = data["time"]
         for tab_name, (json_name, displaytype) in self.all_tabs.items():
             if displaytype == "plot":
-                figure = self.figures[tab_name]
-                figure.patch.set_facecolor("#2e2e2e")  # Match CustomTkinter theme
-                ax = figure.gca()
-                ax.clear()  # Clear the previous plot
-                
-                # Example: Plot a sine wave with random frequency
-                x = time
-                y = data[json_name]
-                ax.plot(x, y, label=f"{tab_name} data")
-                ax.legend()
-                ax.set_title(tab_name)
-                ax.set_facecolor("#1e1e1e")            # Dark axes background
-                ax.spines['top'].set_color("white")
-                ax.spines['right'].set_color("white")
-                ax.spines['bottom'].set_color("white")
-                ax.spines['left'].set_color("white")
-                ax.tick_params(colors="white")       # White ticks
-                ax.title.set_color("white")          # White title
-                ax.xaxis.label.set_color("white")    # White x-axis label
-                ax.yaxis.label.set_color("white")    # White y-axis label
-                ax.grid(color="gray", linestyle="-", linewidth=1)  # Light grid
-                
-                # Refresh the canvas
-                self.graph_canvases[tab_name].draw()
+                # Tabs not viewed yet are plotted when their figure is built
+                if tab_name in self.loaded_tabs:
+                    self.plot_tab(tab_name, data)
             else:
                 print(tab_name)
                 tab = self.graph_tabs.tab(tab_name)
@@ -243,7 +268,7 @@ class GUIclass(ctk.CTk):
                     units = "%"
 
                 # Format and display the metric
-                divide_by=1
+                divide_by = 1000 if units == "kJ" else 1 # Total energy is calculated in J
                 metric_value = data[json_name] / divide_by
                 value = f"{metric_value:.2f}"
                 title_label = ctk.CTkLabel(tab, text=tab_name, font=("Arial Bold", 18))
@@ -251,6 +276,9 @@ class GUIclass(ctk.CTk):
         
                 value_label = ctk.CTkLabel(tab, text=f"{value} {units}", font=("Arial", 16))
                 value_label.pack(pady=(0, 10))
+        
+        # Process the pending idle redraws of all tabs in one pass
+        self.update_idletasks()
     
     def DHW_switch_event(self):
         if self.switch_var.get() == "on":
@@ -258,6 +286,10 @@ class GUIclass(ctk.CTk):
         else:
             self.SimulationObject.changeDHW(False)
     
+    def solver_switch_event(self):
+        # Switches between the fixed step Euler method and the adaptive RK45 solver
+        self.SimulationObject.set_solver(self.solver_var.get())
+    
     def generateParameterFrame(self):
         """Generate input fields for parameters."""
         
@@ -314,6 +346,8 @@ class GUIclass(ctk.CTk):
                    value = value + 273.15 # This parameter is collected in celcius but stored in Kelvin so must be converted
                
                 # Assign to the Simulation object
+               if ValueType == "hot_water_tank" and value != self.SimulationObject.inputValues.value(ValueType, ValueName):
+                   self.SimulationObject.notify_tank_changed() # Tank size changed, so its surface area must be recomputed
                self.SimulationObject.inputValues.change_input_value(ValueType, ValueName, value)
             except ValueError:
                 # Handle invalid inputs gracefully
@@ -321,10 +355,26 @@ class GUIclass(ctk.CTk):
                 continue 
         
         
-        self.SimulationObject.simulate()
-        self.update_graph()
+        try:
+            results = self.SimulationObject.simulate()
+        except ValueError as e:
+            # Inputs the selected solver can't handle, e.g. thresholds the adaptive solver rejects
+            print(f"Error running simulation: {e}")
+            return
+        self.update_graph(results)
         self.simulation_complete_label.grid()
-        self.after(5000, self.simulation_complete_label.grid_remove)
+        
+        # Restart the timer so back-to-back runs don't hide the label early
+        if self.hide_label_job is not None:
+            self.after_cancel(self.hide_label_job)
+        self.hide_label_job = self.after(5000, self.simulation_complete_label.grid_remove)
+        
+    def export_results(self):
+        """Save the latest simulation results to a JSON file."""
+        if self.SimulationObject.simulation_results is None:
+            print("Run a simulation before exporting results.")
+            return
+        self.SimulationObject.export_results()
         
     def run_sensitivity_analysis(self):
         """Run sensitivity analysis and display results."""
@@ -337,44 +387,58 @@ class GUIclass(ctk.CTk):
         increments = int(self.increment_entry.get())
         lower, upper = float(range_values[0]), float(range_values[1])
 
-        step = (upper - lower) / (increments - 1)
-        results = []
-
-        for i in range(increments):
-            value = lower + i * step
-            # Set parameter value in simulation (dummy results for demonstration)
-            results.append((value, value * 1.2))  # Example result calculation
-
-            self.display_bar_chart(self.analysis_frame, results, param)
-       
+        # Take a private copy of the simulator here on the Tk thread, so later edits in the GUI can't
+        # race with the worker thread (it also loads the ambient temperatures once for the whole sweep)
+        simulator = self.SimulationObject.snapshot()
+        
+        values = np.linspace(lower, upper, increments)
+        ValueType, ValueName, _ = self.parameter_map[param]["path"]
+        offset = 273.15 if self.parameter_map[param].get("is_temp") else 0 # Temperatures are entered in celcius but stored in Kelvin
+        
+        # Every value of the parameter is one scenario of a single sweep, run with the selected solver
+        param_grid = {(ValueType, ValueName): values + offset}
+        
+        # Run the sweep in a background thread so the GUI stays responsive
+        threading.Thread(target=self.sensitivity_worker, args=(simulator, param, values, param_grid), daemon=True).start()
+    
+    def sensitivity_worker(self, simulator, param, values, param_grid):
+        """Run the sensitivity analysis sweep and hand the results back to the GUI."""
+        try:
+            metrics = simulator.run_sweep(param_grid)["Total Energy Consumption"]
+        except Exception as e:
+            print(f"Error running sensitivity analysis: {e}")
+            return
+        
+        results = list(zip(values, metrics))
+        
+        # Tk widgets must be updated from the main loop
+        self.after(0, lambda: self.display_bar_chart(self.analysis_frame, results, param))
 
     def display_bar_chart(self, frame, results, param_name):
-    
-       
-           # Validate results
+        """Display sensitivity analysis results as a bar chart below the analysis controls."""
+        # Validate results
         if not results or not all(len(r) == 2 for r in results):
-                raise ValueError("Results must be a list of (value, metric) tuples.")
-            
-            # Clear existing widgets in the frame
-        for widget in frame.winfo_children():
-            widget.destroy()
-            
-            # Prepare data
-            values, metrics = zip(*[(float(v), float(m)) for v, m in results])
-            
-            # Create the bar chart
-            fig, ax = plt.subplots(figsize=(8, 4))
-            ax.bar(values, metrics, color="blue", alpha=0.7)
-            ax.set_xlabel(param_name)
-            ax.set_ylabel("Metric Value")
-            ax.set_title(f"Sensitivity Analysis: {param_name}")
-            
-            # Embed the chart in the GUI
-            canvas = FigureCanvasTkAgg(fig, master=frame)
-            canvas.get_tk_widget().pack(fill="both", expand=True)
-            canvas.draw()
-       
-
+            raise ValueError("Results must be a list of (value, metric) tuples.")
+        
+        # Remove the previous chart, keeping the analysis controls
+        if self.bar_chart_canvas is not None:
+            self.bar_chart_canvas.get_tk_widget().destroy()
+        
+        # Prepare data
+        values, metrics = zip(*[(float(v), float(m)) for v, m in results])
+        
+        # Create the bar chart
+        fig = Figure(figsize=(8, 4), dpi=100)
+        ax = fig.add_subplot(111)
+        ax.bar(values, metrics, color="blue", alpha=0.7)
+        ax.set_xlabel(param_name)
+        ax.set_ylabel("Metric Value")
+        ax.set_title(f"Sensitivity Analysis: {param_name}")
+        
+        # Embed the chart in the GUI
+        self.bar_chart_canvas = FigureCanvasTkAgg(fig, master=frame)
+        self.bar_chart_canvas.get_tk_widget().grid(row=4, column=0, columnspan=2, sticky="nsew", padx=10, pady=10)
+        self.bar_chart_canvas.draw_idle()
 
     def close_window(self):
         self.quit()  # Quit the mainloop when the window is closed
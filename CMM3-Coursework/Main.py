@@ -14,23 +14,24 @@ condenser_temp_celcius = 65 + 273.15  # Condenser temperature in Kelvin (fixed a
 RHratio = 2  # Ratio of height to radius for the tank dimensions
 DHWsimulation = False # Should the simulation account for domestic hot water draw?
 
-# Initialise input data objects    
-input_values = InputValues(input_file)
-input_values.load_data()
-
-manufacturer_cop = ManufacturerCOP(manufacturer_cop_data)
-manufacturer_cop.get_cop_parameters(condenser_temp_celcius)
-
-ambient_data = AmbientTempData()
-ambient_data.set_location(location)
-ambient_data.set_start_time(start_year, start_month, start_day, start_hour)
-ambient_data.set_end_time(end_year, end_month, end_day, end_hour)
-
-interpolated_data = ambient_data.get_ambient_temps()
-
-# Run Simulation
-Simulation = simulation.Simulator(input_values, interpolated_data, manufacturer_cop, RHratio, DHWsimulation)
-
-GUI = GUIclass(Simulation)
-GUI.protocol("WM_DELETE_WINDOW", GUI.close_window)
-GUI.mainloop()
+# Only start the GUI when run as a script, not when this module is imported
+if __name__ == "__main__":
+    # Initialise input data objects    
+    input_values = InputValues(input_file)
+    input_values.load_data()
+
+    manufacturer_cop = ManufacturerCOP(manufacturer_cop_data)
+    manufacturer_cop.get_cop_parameters(condenser_temp_celcius)
+
+    ambient_data = AmbientTempData()
+    ambient_data.set_location(location)
+    ambient_data.set_start_time(start_year, start_month, start_day, start_hour)
+    ambient_data.set_end_time(end_year, end_month, end_day, end_hour)
+
+    # Run Simulation
+    Simulation = simulation.Simulator(input_values, ambient_data, manufacturer_cop, RHratio, DHWsimulation)
+    Simulation.ensure_ambient_loaded()
+
+    GUI = GUIclass(Simulation)
+    GUI.protocol("WM_DELETE_WINDOW", GUI.close_window)
+    GUI.mainloop()
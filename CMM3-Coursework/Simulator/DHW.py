@@ -36,31 +36,32 @@ class DHW:
         Returns:
             pd.Series: A time series of DHW flow rates (kg/s).
         """
-        np.random.seed(42)  # Set seed for reproducibility
+        rng = np.random.default_rng(42)  # Local seeded generator for reproducibility
         total_steps = int(duration * 3600 / time_step)  # Calculate the total number of time steps
         times = np.arange(0, duration * 3600, time_step)  # Time in seconds for the entire duration
-        profile = np.zeros(total_steps)  # Initialize flow rate profile with zeros
     
         # Generate number of DHW events using a Poisson distribution
-        num_events = np.random.poisson(5)  # Average of 5 events/day
+        num_events = rng.poisson(5)  # Average of 5 events/day
     
-        for _ in range(num_events):
-            # Randomize event start time (morning and evening peaks)
-            if np.random.rand() > 0.5:
-                start_time = np.random.normal(loc=7 * 3600, scale=3600)  # Morning peak (~7am)
-            else:
-                start_time = np.random.normal(loc=19 * 3600, scale=3600)  # Evening peak (~7pm)
+        # Randomize event start times (morning and evening peaks) for all events at once
+        is_morning = rng.random(num_events) > 0.5
+        morning_starts = rng.normal(loc=7 * 3600, scale=3600, size=num_events)  # Morning peak (~7am)
+        evening_starts = rng.normal(loc=19 * 3600, scale=3600, size=num_events)  # Evening peak (~7pm)
+        start_times = np.where(is_morning, morning_starts, evening_starts)
     
-            # Randomize event duration (exponentially distributed)
-            duration = np.random.exponential(scale=300)  # Average duration = 5 min
+        # Randomize event durations (exponentially distributed)
+        durations = rng.exponential(scale=300, size=num_events)  # Average duration = 5 min
     
-            # Randomize flow rate for the event (uniform distribution)
-            flow_rate = np.random.uniform(0.3, 0.5)  # Flow rate range: 0.3 to 0.5 kg/s
+        # Randomize flow rates for the events (uniform distribution)
+        flow_rates = rng.uniform(0.3, 0.5, size=num_events)  # Flow rate range: 0.3 to 0.5 kg/s
     
-            # Add event to the profile
-            start_index = int(start_time / time_step)
-            end_index = int((start_time + duration) / time_step)
-            profile[start_index:end_index] += flow_rate
+        # Add events to the profile: mark where each flow starts and stops, then take the running total
+        start_indices = np.clip((start_times / time_step).astype(int), 0, total_steps)
+        end_indices = np.clip(((start_times + durations) / time_step).astype(int), 0, total_steps)
+        changes = np.zeros(total_steps + 1)
+        np.add.at(changes, start_indices, flow_rates)
+        np.add.at(changes, end_indices, -flow_rates)
+        profile = np.cumsum(changes)[:-1]
     
         # Create a Pandas Series for better handling
         return pd.Series(profile, index=times)
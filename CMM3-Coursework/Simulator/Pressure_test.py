@@ -8,9 +8,11 @@ Created on Fri Jun 20 23:18:23 2025
 from pyModbusTCP.client import ModbusClient
 import struct
 import time
+import numpy as np
 import matplotlib.pyplot as plt
 from collections import deque
 import csv
+import os
 
 
 client = ModbusClient(host="10.24.1.22", port=502, auto_open=True)
@@ -29,63 +31,103 @@ data_log = {label: deque(maxlen=MAX_POINTS) for label in modbus_map}
 timestamps = deque(maxlen=MAX_POINTS)
 
 
-csv_log = []
+# -------- CSV Log --------
+# Rows are streamed to disk as they are read, so memory stays flat and a crash loses at most FLUSH_EVERY rows
+FLUSH_EVERY = 10
+filename = f"pressure_log_{time.strftime('%Y%m%d_%H%M%S')}.csv"
+csv_file = open(filename, "w", newline="")
+writer = csv.writer(csv_file)
+writer.writerow(["Time", *modbus_map])
 
 
-def read_float(register):
-    regs = client.read_holding_registers(register, 2)
-    if regs:
-        packed = struct.pack('>HH', regs[0], regs[1])
-        return struct.unpack('>f', packed)[0]
-    return None
+# All sensors are read in one request covering their contiguous block of registers
+FIRST_REGISTER = min(modbus_map.values())
+REGISTER_COUNT = max(modbus_map.values()) + 2 - FIRST_REGISTER  # Each float spans 2 registers
+REGISTERS = struct.Struct(f'>{REGISTER_COUNT}H')
+FLOAT = struct.Struct('>f')
+
+
+def read_floats():
+    regs = client.read_holding_registers(FIRST_REGISTER, REGISTER_COUNT)
+    if regs and len(regs) == REGISTER_COUNT:
+        packed = REGISTERS.pack(*regs)
+        return {label: FLOAT.unpack_from(packed, (reg - FIRST_REGISTER) * 2)[0] for label, reg in modbus_map.items()}
+    return {label: None for label in modbus_map}
 
 
 plt.ion()
 fig, ax = plt.subplots()
 
+# Create the plot lines once and only update their data each reading
+lines = {label: ax.plot([], [], label=label, animated=True)[0] for label in modbus_map}
+ax.set_xlabel("Time (s)")
+ax.set_ylabel("Pressure (bar)")
+ax.set_title("Live Pressure Data")
+ax.legend(loc="upper right")
+
+
+def redraw_background():
+    # Full redraw of the static parts (axes, labels, legend), saved for blitting
+    fig.canvas.draw()
+    return fig.canvas.copy_from_bbox(ax.bbox)
+
+
+background = redraw_background()
+
 print("Reading started Press Ctrl+C to stop.\n")
 
+iteration = 0
 try:
     while True:
         timestamp = time.time()
         timestamps.append(timestamp)
         row = [time.strftime('%H:%M:%S', time.localtime(timestamp))]
 
-        for label, reg in modbus_map.items():
-            val = read_float(reg)
+        readings = read_floats()
+        for label in modbus_map:
+            val = readings[label]
             if val is not None:
                 data_log[label].append(val)
             else:
                 data_log[label].append(0.0)
             row.append(val)
 
-        csv_log.append(row)
+        writer.writerow(row)
+        iteration += 1
+        if iteration % FLUSH_EVERY == 0:
+            csv_file.flush()
+            os.fsync(csv_file.fileno())
 
         # Plotting
-        ax.clear()
-        for label in modbus_map:
-            ax.plot(
-                [t - timestamps[0] for t in timestamps],  # Relative time
-                data_log[label],
-                label=label
-            )
-
-        ax.set_xlabel("Time (s)")
-        ax.set_ylabel("Pressure (bar)")
-        ax.set_title("Live Pressure Data")
-        ax.legend(loc="upper right")
-        plt.pause(1)
+        ts = np.fromiter(timestamps, float, count=len(timestamps))
+        rel_times = ts - ts[0]  # Relative time
+        values = {label: np.fromiter(data_log[label], float, count=len(data_log[label])) for label in modbus_map}
+        for label, line in lines.items():
+            line.set_data(rel_times, values[label])
+
+        # Only rescale (and redraw the background) when the data leaves the current axis limits
+        all_values = np.concatenate(list(values.values()))
+        ymin, ymax = all_values.min(), all_values.max()
+        (x0, x1), (y0, y1) = ax.get_xlim(), ax.get_ylim()
+        if rel_times[-1] > x1 or ymin < y0 or ymax > y1:
+            margin = 0.1 * (ymax - ymin) or 1.0
+            ax.set_xlim(0, max(rel_times[-1] * 1.1, 1.0))
+            ax.set_ylim(ymin - margin, ymax + margin)
+            background = redraw_background()
+
+        # Blit the updated lines over the saved background
+        fig.canvas.restore_region(background)
+        for line in lines.values():
+            ax.draw_artist(line)
+        fig.canvas.blit(ax.bbox)
+        fig.canvas.start_event_loop(1)
 
 except KeyboardInterrupt:
     print("Stopped")
 
 finally:
-    # -------- Save CSV Log --------
-    filename = f"pressure_log_{time.strftime('%Y%m%d_%H%M%S')}.csv"
-    with open(filename, "w", newline="") as f:
-        writer = csv.writer(f)
-        writer.writerow(["Time", "P1", "P2", "P3", "P4", "P5"])
-        writer.writerows(csv_log)
+    # -------- Close CSV Log --------
+    csv_file.close()
     print(f"Logged data saved to: {filename}")
     plt.ioff()
     plt.show()
\ No newline at end of file
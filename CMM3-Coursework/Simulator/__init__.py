@@ -1,2 +1,2 @@
 from .simulation import Simulator
-from .formulae import formulae
\ No newline at end of file
+from . import formulae
\ No newline at end of file
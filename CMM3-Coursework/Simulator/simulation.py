@@ -2,11 +2,11 @@
 Main Simulation Script
 
 This script coordinates the Heat Pump Simulation by collecting inputs, processing data, 
-and solving the tank dynamics model using the Euler method. It generates results 
-for energy consumption, system efficiency, and heat transfer, saving them to a JSON file.
+and solving the tank dynamics model using the Euler method (or an adaptive RK45 solver). It generates results 
+for energy consumption, system efficiency, and heat transfer, which can be exported to a JSON file.
 
 Modules:
-- `formulae`: For scientific calculations like Qload, Qtransfer, Qloss, COP, and efficiency metrics.
+- `formulae`: For scientific calculations like COP, tank geometry, energy totals and efficiency metrics.
 - `DataCollection`: Handles weather data collection and YAML input parsing.
 - `DataProcessing`: Performs data fitting and interpolation for COP and temperature data.
 - `Simulation`: Defines and solves the ODE for tank temperature dynamics.
@@ -17,35 +17,188 @@ Inputs:
 - Manufacturer-provided COP data for the heat pump.
 
 Outputs:
-- JSON file (`simulation_results.json`) with simulation results.
+- Dictionary of simulation results, returned by `simulate()` and held in `simulation_results`.
+- JSON file (`simulation_results.json`) with simulation results, written by `export_results()`.
 
 
 """
 
 # Import necessary modules for Task A of the Heat Pump Simulation project
 
-# Scientific calculations (Qload, Qtransfer, Qloss, COP, etc.)
-from .formulae import formulae  
+# Scientific calculations (COP, tank geometry, energy totals, etc.)
+from . import formulae
 from .DHW import DHW   
 import numpy as np               # Numerical operations
-import json                      # Save results to a JSON file
+from scipy.integrate import solve_ivp  # Adaptive ODE solver
+from numba import njit, prange   # Compiles the Euler time loop
+import orjson                    # Save results to a JSON file
 import os
+import copy
+
+INV_3600 = 1.0 / 3600.0  # Converts seconds to hours by multiplication
+T_COP_CONDENSER = 65 + 273.15  # Condenser temperature the COP curve was fitted against (K)
+
+
+@njit(cache=True, fastmath=True)
+def _euler_kernel(T0, Tamb_values, mdot_values, dt, n, T_on, T_off, UA_cond, Tcond, UA_loss, UA_load, Tsp, cap, fit_a, fit_b, T_inlet, use_dhw, buffers):
+    """
+    Solves the tank temperature ODE using Euler's method, compiled with Numba.
+
+    Args:
+        T0 (float): Initial tank temperature (K).
+        Tamb_values (np.ndarray): Ambient temperature at each time point (K).
+        mdot_values (np.ndarray): DHW flow rate at each time point (kg/s), only used if `use_dhw`.
+        dt (float): Time step (s).
+        n (int): Number of time points.
+        T_on, T_off (float): Heat pump on/off tank temperature thresholds (K).
+        UA_cond (float): Condenser U-value times heat transfer area (W/K).
+        Tcond (float): Condenser temperature (K).
+        UA_loss (float): Tank heat loss coefficient times tank surface area (W/K).
+        UA_load (float): Wall and roof area times U-value, summed (W/K).
+        Tsp (float): Indoor setpoint temperature (K).
+        cap (float): Total thermal capacity of the tank (J/K).
+        fit_a, fit_b (float): Fitted COP parameters.
+        T_inlet (float): DHW cold water inlet temperature (K).
+        use_dhw (bool): Whether to include DHW draw-off losses.
+        buffers (tuple): Seven zeroed arrays of length `n` that the results are written into.
+
+    Returns:
+        tuple: Arrays of tank temperature (K), heat load (W), heat loss (W), COP, power input (W),
+               heat transfer (W) and DHW heat loss (W) at each time point.
+    """
+    Ttank_values, heat_load_values, heat_loss_values, cop_values, Pin_values, Qtransfer_values, QDHW_values = buffers
+    
+    Ttank_values[0] = T0
+    pump = 1 if T0 < T_on else 0  # Heat pump status, 1 = on
+    inv_cap = 1.0 / cap  # Multiply by the reciprocal in the loop instead of dividing each step
+    
+    for i in range(1, n):
+        Ttank = Ttank_values[i - 1]  # Current tank temperature
+        Tamb = Tamb_values[i - 1]  # Current ambient temperature
+        
+        if use_dhw:
+            QDHW = mdot_values[i - 1] * 4186 * (Ttank - T_inlet)  # DHW heat loss (W)
+        else:
+            QDHW = 0.0
+        
+        # Update pump status based on thresholds: off at or above T_off (which takes precedence),
+        # otherwise switches on at T_on and stays on
+        pump = int(Ttank < T_off) & (pump | int(Ttank <= T_on))
+        
+        # Calculate heat load, transfer, and loss
+        Qload = -UA_load * (Tamb - Tsp)
+        Qtransfer = pump * UA_cond * (Tcond - Ttank)
+        Qloss = UA_loss * (Ttank - Tamb)
+        
+        # Calculate COP and power input
+        COP = pump * (fit_a + fit_b / (T_COP_CONDENSER - Tamb))
+        Pin = Qtransfer / COP if COP > 0 else 0.0
+        
+        # Store values in corresponding arrays
+        heat_load_values[i] = Qload
+        Qtransfer_values[i] = Qtransfer
+        heat_loss_values[i] = Qloss
+        cop_values[i] = COP
+        Pin_values[i] = Pin
+        QDHW_values[i] = QDHW
+        
+        # Update tank temperature using Euler's method
+        dTdt = (Qtransfer - Qload - Qloss - QDHW) * inv_cap
+        Ttank_values[i] = Ttank + dt * dTdt
+    
+    return Ttank_values, heat_load_values, heat_loss_values, cop_values, Pin_values, Qtransfer_values, QDHW_values
+
+
+
+@njit(cache=True, parallel=True, nogil=True)
+def _euler_sweep(T0, Tamb_values, mdot_values, dt, n, T_on, T_off, UA_cond, Tcond, UA_loss, UA_load, Tsp, cap, fit_a, fit_b, T_inlet, use_dhw):
+    """
+    Solves the tank temperature ODE for several scenarios at once, one scenario per thread.
+
+    Args:
+        T0, T_on, T_off, UA_cond, Tcond, UA_loss, UA_load, Tsp, cap (np.ndarray): Per-scenario values of
+            the corresponding `_euler_kernel` arguments, each of length S.
+        Tamb_values, mdot_values, dt, n, fit_a, fit_b, T_inlet, use_dhw: Shared by every scenario, as
+            in `_euler_kernel`.
+
+    Returns:
+        np.ndarray: Array of shape (7, S, n) holding the seven `_euler_kernel` outputs for each scenario.
+    """
+    S = T0.shape[0]
+    out = np.zeros((7, S, n))
+    
+    # Scenarios are independent, so each one runs the full time loop on its own thread
+    for s in prange(S):
+        _euler_kernel(T0[s], Tamb_values, mdot_values, dt, n, T_on[s], T_off[s], UA_cond[s], Tcond[s], UA_loss[s],
+                      UA_load[s], Tsp[s], cap[s], fit_a, fit_b, T_inlet, use_dhw,
+                      (out[0, s], out[1, s], out[2, s], out[3, s], out[4, s], out[5, s], out[6, s]))
+    
+    return out
+
 
 class Simulator:
-    def __init__(self, inputValues, interpolated_data, manufacturer_cop, RHratio, DHWsimulationBool):
+    def __init__(self, inputValues, ambient_data, manufacturer_cop, RHratio, DHWsimulationBool):
         self.inputValues = inputValues
-        self.interpolated_data = interpolated_data
+        self.ambient_data = ambient_data
+        self.interpolated_data = None # Ambient temperature interpolator, loaded once by ensure_ambient_loaded()
         self.fit_a = manufacturer_cop.fit_a
         self.fit_b = manufacturer_cop.fit_b
         self.RHratio = RHratio
+        self._Atank = None # Tank surface area (m²), computed on first use and reset by notify_tank_changed()
         
         # Simulation Conditions
         
         
         self.simulation_results = None
+        self._dhw_interp = None # DHW flow interpolator, built the first time DHW is simulated
+        self.solver = "euler" # ODE solver used by simulate(), 'euler' or 'adaptive'
         self.DHW = DHWsimulationBool # Domestic hot water simulation turned off by default
      
-    def euler(self):   
+    def ensure_ambient_loaded(self):
+        # The ambient temperature interpolator doesn't depend on the simulation inputs, so it is
+        # only built once and reused by every simulation run (including sensitivity analysis)
+        if self.interpolated_data is None:
+            self.interpolated_data = self.ambient_data.get_ambient_temps()
+        return self.interpolated_data
+     
+    def _prepare_constants(self):
+        """
+        Looks up the inputs that stay constant during a simulation and combines them
+        into the heat transfer coefficients used by the Euler loop.
+
+        Returns:
+            tuple: UA_load (W/K), Tsp (K), UA_cond (W/K), Tcond (K), UA_loss (W/K), cap (J/K) as floats.
+        """
+        value = self.inputValues.value
+        
+        # Building heat load coefficient, walls and roof combined
+        UA_load = value('building_properties', 'wall_area') * value('building_properties', 'wall_U_value') \
+            + value('building_properties', 'roof_area') * value('building_properties', 'roof_U_value')
+        Tsp = value('building_properties', 'indoor_setpoint_temperature_K')
+        
+        # Condenser to tank heat transfer coefficient
+        UA_cond = value('heat_pump', 'overall_heat_transfer_coefficient') * value('heat_pump', 'heat_transfer_area')
+        Tcond = value('heat_pump', 'fixed_condenser_temperature_K')
+        
+        # Tank to ambient heat loss coefficient
+        if self._Atank is None:
+            self._Atank = formulae.tank_SA(self.inputValues, self.RHratio)
+        UA_loss = value('hot_water_tank', 'heat_loss_coefficient') * self._Atank
+        cap = value('hot_water_tank', 'total_thermal_capacity')
+        
+        return float(UA_load), float(Tsp), float(UA_cond), float(Tcond), float(UA_loss), float(cap)
+     
+    def notify_tank_changed(self):
+        """
+        Marks the cached tank surface area as stale. Must be called after changing the tank
+        water mass or the height-radius ratio, so the next run recomputes it.
+        """
+        self._Atank = None
+     
+    def _load_conditions(self):
+        """
+        Reads the simulation conditions (thresholds, time grid and initial state) for a run.
+        """
         self.T_off = self.inputValues.value('heat_pump', 'off_temperature_threshold_K')
         self.T_on = self.inputValues.value('heat_pump', 'on_temperature_threshold_K')
         self.total_time = self.inputValues.value('simulation_parameters', 'total_time_seconds')
@@ -57,100 +210,264 @@ class Simulator:
         # Initial Conditions
         self.initial_tank_temp = self.inputValues.value('initial_conditions', 'initial_tank_temperature_K')
         self.initial_pump_status = 'on' if self.initial_tank_temp < self.T_on else 'off'
+    
+    def _get_dhw_interp(self):
+        # The seeded DHW profile is the same every run, so its interpolator is only built once
+        if self._dhw_interp is None:
+            self._dhw_interp = DHW.get_dhw_profile()
+        return self._dhw_interp
+    
+    def _format_results(self, hours, Ttank_values, heat_load_values, heat_loss_values, cop_values, Pin_values, Qtransfer_values, QDHW_values):
+        # Results stay as NumPy arrays; each run allocates its own, so earlier results are never overwritten
+        if self.DHW:
+            QDHWReturn = QDHW_values # DHW heat loss values (W)
+        else:
+            QDHWReturn = "DHW Simulation Off"
+            
+        return (    
+            hours,  # Time values in hours
+            Ttank_values,  # Tank temperatures (K)
+            heat_load_values,  # Heat load values (W)
+            heat_loss_values,  # Heat loss values (W)
+            cop_values,  # COP values
+            Pin_values,  # Power input values (W)
+            Qtransfer_values,  # Heat transfer values (W)
+            QDHWReturn
+            )
+    
+    def euler(self):   
+        self.ensure_ambient_loaded()
+        self._load_conditions()
+        
+        UA_load, Tsp, UA_cond, Tcond, UA_loss, cap = self._prepare_constants()
+        
+        # Evaluate the ambient temperature and DHW flow at every time point in one vectorised call
+        hours = self.time_values * INV_3600  # Convert time to hours
+        Tamb_values = np.asarray(self.interpolated_data(hours), dtype=np.float64)
+        if self.DHW:
+            mdot_values = np.asarray(self._get_dhw_interp()(hours), dtype=np.float64)
+        else:
+            mdot_values = np.zeros(0)
         
+        Ttank_values, heat_load_values, heat_loss_values, cop_values, Pin_values, Qtransfer_values, QDHW_values = _euler_kernel(
+            float(self.initial_tank_temp), Tamb_values, mdot_values, float(self.step_size), int(self.num_points),
+            float(self.T_on), float(self.T_off), UA_cond, Tcond, UA_loss, UA_load, Tsp, cap,
+            float(self.fit_a), float(self.fit_b), float(self.T_inlet), bool(self.DHW),
+            tuple(np.zeros(self.num_points) for _ in range(7)))
+    
+        return self._format_results(hours, Ttank_values, heat_load_values, heat_loss_values, cop_values, Pin_values, Qtransfer_values, QDHW_values)
+    
+    def adaptive(self):
+        """
+        Solves the tank temperature ODE with SciPy's adaptive Dormand-Prince (RK45) solver.
         
-        pump_status = self.initial_pump_status
+        The heat pump switching is handled as solver events: the ODE is integrated with the pump
+        state fixed until the tank reaches the relevant threshold, then restarted with the pump
+        toggled. This keeps the right-hand side smooth within each segment, so the step size is
+        only limited by accuracy. The solution is sampled at the same time points as `euler`.
+        """
+        self.ensure_ambient_loaded()
+        self._load_conditions()
         
-        Ttank_values = np.zeros(self.num_points)  # Tank temperature (K)
-        cop_values = np.zeros(self.num_points)  # COP values
-        heat_load_values = np.zeros(self.num_points)  # Heat load (W)
-        heat_loss_values = np.zeros(self.num_points)  # Heat loss (W)
-        Pin_values = np.zeros(self.num_points)  # Power input (W)
-        Qtransfer_values = np.zeros(self.num_points)  # Heat transfer (W)
+        # With T_on >= T_off the Euler rule switches the pump every step around T_off, which has no
+        # event-based equivalent: the restarted segment would start on its own switching event
+        if self.T_on >= self.T_off:
+            raise ValueError("The adaptive solver requires the on temperature threshold to be below the off threshold")
         
-        if self.DHW:
-            dhw_interp_profile = DHW.get_dhw_profile()
-            QDHW_values = np.zeros(self.num_points)  # DHW heat loss (W)
+        UA_load, Tsp, UA_cond, Tcond, UA_loss, cap = self._prepare_constants()
+        Tamb_interp = self.interpolated_data
+        dhw_interp = self._get_dhw_interp() if self.DHW else None
+        T_inlet = self.T_inlet
+        inv_cap = 1.0 / cap
+        
+        def rhs(t, y, pump_on):
+            Ttank = y[0]
+            Tamb = Tamb_interp(t * INV_3600)
+            Qload = -UA_load * (Tamb - Tsp)
+            Qtransfer = UA_cond * (Tcond - Ttank) if pump_on else 0.0
+            Qloss = UA_loss * (Ttank - Tamb)
+            QDHW = dhw_interp(t * INV_3600) * 4186 * (Ttank - T_inlet) if dhw_interp is not None else 0.0
+            return [(Qtransfer - Qload - Qloss - QDHW) * inv_cap]
+        
+        # Pump turns off when the tank warms up to T_off, and on when it cools down to T_on
+        def reached_off(t, y, pump_on):
+            return y[0] - self.T_off
+        reached_off.terminal = True
+        reached_off.direction = 1
+        
+        def reached_on(t, y, pump_on):
+            return y[0] - self.T_on
+        reached_on.terminal = True
+        reached_on.direction = -1
+        
+        # Steps must be short enough not to skip over hourly temperature changes or DHW draw-offs
+        max_step = 60.0 if self.DHW else 3600.0
+        
+        # Integrate piecewise between pump switching events
+        t = 0.0
+        Ttank = float(self.initial_tank_temp)
+        pump_on = Ttank <= self.T_on and Ttank < self.T_off
+        segments = []
+        while t < self.total_time:
+            solution = solve_ivp(rhs, (t, self.total_time), [Ttank], method='RK45', dense_output=True,
+                                 events=reached_off if pump_on else reached_on, args=(pump_on,), max_step=max_step)
+            if solution.status == -1:
+                raise RuntimeError(f"Adaptive solver failed: {solution.message}")
+            segments.append((t, pump_on, solution.sol))
+            if solution.status != 1:
+                break
             
+            # Restart from the event with the pump toggled, which must have moved the solution on
+            if solution.t[-1] <= t:
+                raise RuntimeError(f"Adaptive solver stopped advancing at t = {t} s")
+            t = solution.t[-1]
+            Ttank = solution.y[0, -1]
+            pump_on = not pump_on
+        
+        # Sample the dense output of each segment at the requested time points
+        Ttank_values = np.empty(self.num_points)
+        pump_values = np.zeros(self.num_points, dtype=bool)
+        for start, segment_pump_on, dense in segments:
+            mask = self.time_values >= start
+            Ttank_values[mask] = dense(self.time_values[mask])[0]
+            pump_values[mask] = segment_pump_on
         
-        Atank = formulae.tank_SA(self.inputValues, self.RHratio)
+        # Evaluate the heat flows at every time point
+        hours = self.time_values * INV_3600  # Convert time to hours
+        Tamb_values = np.asarray(Tamb_interp(hours), dtype=np.float64)
+        heat_load_values = -UA_load * (Tamb_values - Tsp)
+        heat_loss_values = UA_loss * (Ttank_values - Tamb_values)
+        Qtransfer_values = np.where(pump_values, UA_cond * (Tcond - Ttank_values), 0.0)
+        cop_values = np.where(pump_values, formulae.COP(T_COP_CONDENSER - Tamb_values, self.fit_a, self.fit_b), 0.0)
+        Pin_values = np.divide(Qtransfer_values, cop_values, out=np.zeros(self.num_points), where=cop_values > 0)
+        if self.DHW:
+            QDHW_values = np.asarray(dhw_interp(hours), dtype=np.float64) * 4186 * (Ttank_values - T_inlet)
+        else:
+            QDHW_values = None
         
-        Ttank_values[0] = self.initial_tank_temp
+        # Match the Euler loop's convention: the heat flows at the start of each step are stored at the
+        # end of the step, leaving index 0 at zero, so both solvers' totals and maxima compare directly
+        def step_values(values):
+            shifted = np.zeros(self.num_points)
+            shifted[1:] = values[:-1]
+            return shifted
+        heat_load_values, heat_loss_values, Qtransfer_values, cop_values, Pin_values = (
+            step_values(values) for values in (heat_load_values, heat_loss_values, Qtransfer_values, cop_values, Pin_values))
+        if self.DHW:
+            QDHW_values = step_values(QDHW_values)
         
-        for i in range(1, self.num_points):
-            t = self.time_values[i - 1]  # Current time
-            Ttank = Ttank_values[i - 1]  # Current tank temperature
+        return self._format_results(hours, Ttank_values, heat_load_values, heat_loss_values, cop_values, Pin_values, Qtransfer_values, QDHW_values)
     
-            # Interpolate ambient temperature
-            Tamb = self.interpolated_data(t / 3600)  # Convert time to hours
+    def run_sweep(self, param_grid):
+        """
+        Runs the simulation for a batch of scenarios with the selected solver. Euler scenarios are
+        solved in parallel in one compiled sweep; adaptive scenarios are solved one at a time.
+
+        Args:
+            param_grid (dict): Maps (ValueType, ValueName) to a sequence of values, one per scenario.
+                               Every sequence must have the same length S. The time grid
+                               (total time and number of points) must be the same for every scenario.
+
+        Returns:
+            dict: "time" holds the time values (hours) and "Total Energy Consumption" the total energy
+                  of each scenario (J); the other entries are arrays of shape (S, N) with one row per
+                  scenario, in the same units as `store_values`.
+        """
+        keys = list(param_grid)
+        columns = [np.asarray(param_grid[key], dtype=np.float64) for key in keys]
+        if not columns or len({len(column) for column in columns}) != 1:
+            raise ValueError("param_grid must hold at least one parameter, with the same number of values for each")
+        S = len(columns[0])
+        
+        self.ensure_ambient_loaded()
+        value = self.inputValues.value
+        original = {key: value(*key) for key in keys}
+        tank_changed = any(ValueType == 'hot_water_tank' for ValueType, _ in keys)
+        adaptive = self.solver == "adaptive"
+        
+        # Pack each scenario's constants into per-scenario vectors (or, for the adaptive solver, solve
+        # each scenario in turn), restoring the inputs afterwards
+        rows = []
+        try:
+            for s in range(S):
+                for key, column in zip(keys, columns):
+                    self.inputValues.change_input_value(*key, column[s])
+                if tank_changed:
+                    self.notify_tank_changed()
+                self._load_conditions()
+                if s == 0:
+                    total_time, num_points = self.total_time, self.num_points
+                elif (self.total_time, self.num_points) != (total_time, num_points):
+                    raise ValueError("All scenarios in a sweep must share the same time grid")
+                if adaptive:
+                    rows.append(self.adaptive())
+                else:
+                    rows.append((self.initial_tank_temp, self.T_on, self.T_off, *self._prepare_constants()))
+        finally:
+            for key, original_value in original.items():
+                self.inputValues.change_input_value(*key, original_value)
+            if tank_changed:
+                self.notify_tank_changed()
+            self._load_conditions()
+        
+        if adaptive:
+            # Stack the per-scenario results into (S, N) arrays
+            hours = rows[0][0]
+            Ttank_values, heat_load_values, heat_loss_values, cop_values, Pin_values, Qtransfer_values = (
+                np.stack(series) for series in zip(*(row[1:7] for row in rows)))
+            QDHW_values = np.stack([row[7] for row in rows]) if self.DHW else None
+        else:
+            T0, T_on, T_off, UA_load, Tsp, UA_cond, Tcond, UA_loss, cap = (np.ascontiguousarray(column) for column in np.array(rows, dtype=np.float64).T)
             
-            if self.DHW: 
-                mdot_DHW = dhw_interp_profile(t / 3600)
-                QDHW = mdot_DHW * 4186 * (Ttank - self.T_inlet)  # DHW heat loss (W)
+            # Ambient temperature and DHW flow are shared by every scenario
+            hours = self.time_values * INV_3600  # Convert time to hours
+            Tamb_values = np.asarray(self.interpolated_data(hours), dtype=np.float64)
+            if self.DHW:
+                mdot_values = np.asarray(self._get_dhw_interp()(hours), dtype=np.float64)
             else:
-                QDHW = 0
-    
-            # Update pump status based on thresholds
-            if Ttank >= self.T_off:
-                pump_status = 'off'
-            elif Ttank <= self.T_on:
-                pump_status = 'on'
-    
-            # Calculate heat load, transfer, and loss
-            Qload = formulae.CalculateQload(self.inputValues, Tamb)
-            Qtransfer = formulae.CalculateQtransfer(self.inputValues, Ttank) if pump_status == 'on' else 0
-            Qloss = formulae.CalculateQloss(self.inputValues, Atank, Ttank, Tamb)
-    
-    
-            # Calculate COP and power input
-            COP = formulae.COP(65 + 273.15 - Tamb, self.fit_a, self.fit_b) if pump_status == 'on' else 0
-            Pin = Qtransfer / COP if COP > 0 else 0
-    
-            # Store values in corresponding arrays
-            heat_load_values[i] = Qload
-            Qtransfer_values[i] = Qtransfer
-            heat_loss_values[i] = Qloss
-            cop_values[i] = COP
-            Pin_values[i] = Pin
+                mdot_values = np.zeros(0)
+            
+            Ttank_values, heat_load_values, heat_loss_values, cop_values, Pin_values, Qtransfer_values, QDHW_values = _euler_sweep(
+                T0, Tamb_values, mdot_values, float(self.step_size), int(self.num_points),
+                T_on, T_off, UA_cond, Tcond, UA_loss, UA_load, Tsp, cap,
+                float(self.fit_a), float(self.fit_b), float(self.T_inlet), bool(self.DHW))
+        
+        # Total energy consumption of each scenario, integrated the same way as calculate_performance
+        total_energy = np.array([formulae.calculate_totals(hours, Pin_row, Qtransfer_row, heat_loss_row, heat_load_row)[0]
+                                 for Pin_row, Qtransfer_row, heat_loss_row, heat_load_row
+                                 in zip(Pin_values, Qtransfer_values, heat_loss_values, heat_load_values)])
+        
+        return {
+            "time": hours,
+            "temperature": Ttank_values - 273.15,  # Convert Kelvin to Celsius
+            "heat_load": heat_load_values,
+            "heat_loss": heat_loss_values,
+            "COP": cop_values,
+            "Power consumption": Pin_values,
+            "Heat transfer": Qtransfer_values,
+            "Domestic Hot Water Loss": QDHW_values if self.DHW else None,
+            "Total Energy Consumption": total_energy
+        }
     
-            # Update tank temperature using Euler's method
-            dTdt = (Qtransfer - Qload - Qloss - QDHW) / self.inputValues.value('hot_water_tank','total_thermal_capacity')
-            Ttank_values[i] = Ttank + self.step_size * dTdt
+    def solve(self):
+        """Solves the tank temperature ODE with the selected solver ('euler' or 'adaptive')."""
+        if self.solver == "adaptive":
+            return self.adaptive()
+        return self.euler()
     
-        # Convert time to hours for output and data to lists for compatibility with JSON serialization 
-        if self.DHW:
-            QDHWReturn = QDHW_values.tolist() # DHW heat loss values (W)
-        else:
-            QDHWReturn = "DHW Simulation Off"
-            
-        return (    
-            (self.time_values / 3600).tolist(),  # Time values in hours
-            Ttank_values.tolist(),  # Tank temperatures (K)
-            heat_load_values.tolist(),  # Heat load values (W)
-            heat_loss_values.tolist(),  # Heat loss values (W)
-            cop_values.tolist(),  # COP values
-            Pin_values.tolist(),  # Power input values (W)
-            Qtransfer_values.tolist(),  # Heat transfer values (W)
-            QDHWReturn
-            )
+    def set_solver(self, solver):
+        if solver not in ("euler", "adaptive"):
+            raise ValueError(f"Unknown solver '{solver}', expected 'euler' or 'adaptive'")
+        self.solver = solver
 
-    
     def calculate_performance(self, time_values, temperature_values, heat_load_values, heat_loss_values, cop_values, Pin_values, Qtransfer_values):
         # ================================================
         # Calculate Performance Metrics
         # ================================================
 
-        # Calculate total energy consumption (J)
-        total_energy = formulae.calculate_total_energy_consumption(Pin_values, time_values)
-
-        # Calculate total heat loss (J)
-        #total_qloss = formulae.calculate_total_heat_loss(heat_loss_values, time_values)
-
-        # Calculate total heat transfer (J)
-        total_qtransfer = formulae.calculate_total_heat_transfer(Qtransfer_values, time_values)
-
-        # Calculate total heat load (J)
-        hl_tot = formulae.calculate_total_heat_loss(heat_load_values, time_values)
+        # Calculate total energy consumption, heat transfer, heat loss and heat load (J) in one pass
+        total_energy, total_qtransfer, total_qloss, hl_tot = formulae.calculate_totals(
+            time_values, Pin_values, Qtransfer_values, heat_loss_values, heat_load_values)
 
         # Calculate total system efficiency
         total_eff = formulae.calculate_total_eff(hl_tot, total_qtransfer)
@@ -163,8 +480,8 @@ class Simulator:
     def store_values(self, time_values, temperature_values, heat_load_values, heat_loss_values, cop_values, Pin_values, total_energy, total_eff, max_out, QDHW):
         # Prepare the results dictionary
         results = {
-            "time": time_values,  # Convert NumPy array to list for JSON serialization
-            "temperature": [temp - 273.15 for temp in temperature_values],  # Convert Kelvin to Celsius
+            "time": time_values,
+            "temperature": np.asarray(temperature_values) - 273.15,  # Convert Kelvin to Celsius
             "heat_load": heat_load_values,
             "heat_loss": heat_loss_values,
             "COP": cop_values,
@@ -175,26 +492,51 @@ class Simulator:
             "Domestic Hot Water Loss": QDHW
         }
         
+        # Keep the results in memory for the GUI
+        self.simulation_results = results
+        return results
+    
+    def export_results(self):
+        if self.simulation_results is None:
+            raise ValueError("No simulation results to export")
+        
         self.current_folder = os.path.dirname(__file__)  # Current file's folder
         self.parent_folder = os.path.abspath(os.path.join(self.current_folder, ".."))  # Parent folder
         target_folder = os.path.join(self.parent_folder, 'Data')
         target_file_path = os.path.join(target_folder, 'simulation_results.json')
         
-        # Write results to a JSON file
-        with open(target_file_path, "w") as file:
-            json.dump(results, file)
+        # Write results to a JSON file, serializing the NumPy arrays directly
+        with open(target_file_path, "wb") as file:
+            file.write(orjson.dumps(self.simulation_results, option=orjson.OPT_SERIALIZE_NUMPY))
 
         print("Simulation results saved to ../Data/simulation_results.json")
 
         
     def simulate(self):
-        time_values, temperature_values, heat_load_values, heat_loss_values, cop_values, Pin_values, Qtransfer_values, QDHW = Simulator.euler(self)
-        total_energy, total_eff, max_out = Simulator.calculate_performance(self, time_values, temperature_values, heat_load_values, heat_loss_values, cop_values, Pin_values, Qtransfer_values)
-        Simulator.store_values(self, time_values, temperature_values, heat_load_values, heat_loss_values, cop_values, Pin_values, total_energy, total_eff, max_out, QDHW)
+        time_values, temperature_values, heat_load_values, heat_loss_values, cop_values, Pin_values, Qtransfer_values, QDHW = self.solve()
+        total_energy, total_eff, max_out = self.calculate_performance(time_values, temperature_values, heat_load_values, heat_loss_values, cop_values, Pin_values, Qtransfer_values)
+        return self.store_values(time_values, temperature_values, heat_load_values, heat_loss_values, cop_values, Pin_values, total_energy, total_eff, max_out, QDHW)
+    
+    def snapshot(self):
+        """
+        Returns an independent copy of the simulator, e.g. for the GUI's sensitivity analysis
+        sweep, which runs on a background thread while the original keeps being edited.
+        
+        The inputs are deep copied and the interpolators get their own evaluation state, but their
+        read-only data is shared. The raw weather data isn't needed by the copy, so the ambient
+        temperatures are loaded first and it is left out.
+        """
+        self.ensure_ambient_loaded()
+        clone = copy.copy(self)
+        clone.inputValues = copy.deepcopy(self.inputValues)
+        clone.interpolated_data = copy.copy(self.interpolated_data)
+        clone._dhw_interp = copy.copy(self._dhw_interp)
+        clone.ambient_data = None
+        clone.simulation_results = None
+        return clone
     
     def set_dhw_inlet_temp(self, NewTinlet):
         self.T_inlet = NewTinlet
     
     def changeDHW(self, newValue):
         self.DHW = newValue
-